@@ -5,19 +5,9 @@ import json
 from django.utils import timezone
 from django.db.models import (
     Q,
-    OuterRef,
-    F,
-    Func,
-    UUIDField,
-    Value,
-    CharField,
-    Case,
-    When,
+    Prefetch,
 )
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models.functions import Coalesce
-from django.contrib.postgres.aggregates import ArrayAgg
-from django.contrib.postgres.fields import ArrayField
 
 # Third Party imports
 from rest_framework.response import Response
@@ -34,11 +24,45 @@ from plane.db.models import (
     Project,
     IssueRelation,
     Issue,
-    FileAsset,
-    IssueLink,
+    Label,
+    User,
 )
 from plane.bgtasks.issue_activities_task import issue_activity
 
+# Related issue keys read straight off the issue row, mapped to the
+# attribute holding them; also the column list for the issue query
+RELATED_ISSUE_COLUMNS = {
+    "id": "id",
+    "name": "name",
+    "state_id": "state_id",
+    "sort_order": "sort_order",
+    "priority": "priority",
+    "sequence_id": "sequence_id",
+    "project_id": "project_id",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "created_by": "created_by_id",
+    "updated_by": "updated_by_id",
+}
+
+# Keys of a related issue row, in the order of related_issue_values
+RELATED_ISSUE_FIELDS = [
+    *RELATED_ISSUE_COLUMNS,
+    "label_ids",
+    "assignee_ids",
+    "relation_type",
+]
+
+
+def related_issue_values(issue, relation_type):
+    # Label and assignee ids are read from the prefetched relations
+    return (
+        *(getattr(issue, column) for column in RELATED_ISSUE_COLUMNS.values()),
+        [label.id for label in issue.labels.all()],
+        [assignee.id for assignee in issue.assignees.all()],
+        relation_type,
+    )
+
 
 class IssueRelationViewSet(BaseViewSet):
     serializer_class = IssueRelationSerializer
@@ -50,174 +74,110 @@ class IssueRelationViewSet(BaseViewSet):
     def list(self, request, slug, project_id, issue_id):
         issue_relations = (
             IssueRelation.objects.filter(
-                Q(issue_id=issue_id) | Q(related_issue=issue_id)
+                Q(issue_id=issue_id) | Q(related_issue=issue_id),
+                workspace__slug=slug,
             )
-            .filter(workspace__slug=self.kwargs.get("slug"))
-            .select_related("project")
-            .select_related("workspace")
-            .select_related("issue")
-            .order_by("-created_at")
-            .distinct()
+            .order_by()
+            .values_list("issue_id", "related_issue_id", "relation_type")
         )
-        # get all blocking issues
-        blocking_issues = issue_relations.filter(
-            relation_type="blocked_by", related_issue_id=issue_id
-        ).values_list("issue_id", flat=True)
-
-        # get all blocked by issues
-        blocked_by_issues = issue_relations.filter(
-            relation_type="blocked_by", issue_id=issue_id
-        ).values_list("related_issue_id", flat=True)
-
-        # get all duplicate issues
-        duplicate_issues = issue_relations.filter(
-            issue_id=issue_id, relation_type="duplicate"
-        ).values_list("related_issue_id", flat=True)
-
-        # get all relates to issues
-        duplicate_issues_related = issue_relations.filter(
-            related_issue_id=issue_id, relation_type="duplicate"
-        ).values_list("issue_id", flat=True)
-
-        # get all relates to issues
-        relates_to_issues = issue_relations.filter(
-            issue_id=issue_id, relation_type="relates_to"
-        ).values_list("related_issue_id", flat=True)
 
-        # get all relates to issues
-        relates_to_issues_related = issue_relations.filter(
-            related_issue_id=issue_id, relation_type="relates_to"
-        ).values_list("issue_id", flat=True)
+        # Bucket the related issue ids by relation type and direction
+        blocking_issues = set()
+        blocked_by_issues = set()
+        duplicate_issues = set()
+        duplicate_issues_related = set()
+        relates_to_issues = set()
+        relates_to_issues_related = set()
+        for relation_issue_id, related_issue_id, relation_type in list(
+            issue_relations
+        ):
+            if relation_type == "blocked_by":
+                if related_issue_id == issue_id:
+                    blocking_issues.add(relation_issue_id)
+                else:
+                    blocked_by_issues.add(related_issue_id)
+            elif relation_type == "duplicate":
+                if relation_issue_id == issue_id:
+                    duplicate_issues.add(related_issue_id)
+                else:
+                    duplicate_issues_related.add(relation_issue_id)
+            elif relation_type == "relates_to":
+                if relation_issue_id == issue_id:
+                    relates_to_issues.add(related_issue_id)
+                else:
+                    relates_to_issues_related.add(relation_issue_id)
 
+        # issue_objects joins issue_inbox, which can repeat an issue once per
+        # inbox row now that no aggregate groups the rows, hence distinct
         queryset = (
             Issue.issue_objects.filter(workspace__slug=slug)
-            .select_related("workspace", "project", "state", "parent")
-            .prefetch_related("assignees", "labels", "issue_module__module")
-            .annotate(
-                cycle_id=Case(
-                    When(
-                        issue_cycle__cycle__deleted_at__isnull=True,
-                        then=F("issue_cycle__cycle_id"),
-                    ),
-                    default=None,
-                )
-            )
-            .annotate(
-                link_count=IssueLink.objects.filter(issue=OuterRef("id"))
-                .order_by()
-                .annotate(count=Func(F("id"), function="Count"))
-                .values("count")
-            )
-            .annotate(
-                attachment_count=FileAsset.objects.filter(
-                    issue_id=OuterRef("id"),
-                    entity_type=FileAsset.EntityTypeContext.ISSUE_ATTACHMENT,
-                )
-                .order_by()
-                .annotate(count=Func(F("id"), function="Count"))
-                .values("count")
-            )
-            .annotate(
-                sub_issues_count=Issue.issue_objects.filter(
-                    parent=OuterRef("id")
-                )
-                .order_by()
-                .annotate(count=Func(F("id"), function="Count"))
-                .values("count")
-            )
-            .annotate(
-                label_ids=Coalesce(
-                    ArrayAgg(
-                        "labels__id",
-                        distinct=True,
-                        filter=(
-                            ~Q(labels__id__isnull=True)
-                            & Q(labels__deleted_at__isnull=True)
-                        ),
-                    ),
-                    Value([], output_field=ArrayField(UUIDField())),
+            .only(*RELATED_ISSUE_COLUMNS.values())
+            .prefetch_related(
+                Prefetch(
+                    "labels",
+                    queryset=Label.objects.distinct().only("id"),
                 ),
-                assignee_ids=Coalesce(
-                    ArrayAgg(
-                        "assignees__id",
-                        distinct=True,
-                        filter=~Q(assignees__id__isnull=True)
-                        & Q(assignees__member_project__is_active=True),
-                    ),
-                    Value([], output_field=ArrayField(UUIDField())),
+                Prefetch(
+                    "assignees",
+                    queryset=User.objects.filter(
+                        member_project__is_active=True
+                    )
+                    .distinct()
+                    .only("id"),
                 ),
             )
-        ).distinct()
+            .distinct()
+        )
 
-        # Fields
-        fields = [
-            "id",
-            "name",
-            "state_id",
-            "sort_order",
-            "priority",
-            "sequence_id",
-            "project_id",
-            "label_ids",
-            "assignee_ids",
-            "created_at",
-            "updated_at",
-            "created_by",
-            "updated_by",
-            "relation_type",
-        ]
+        # Duplicate and relates to are symmetric, so both directions are
+        # returned together
+        duplicate_ids = duplicate_issues | duplicate_issues_related
+        relates_to_ids = relates_to_issues | relates_to_issues_related
 
-        response_data = {
-            "blocking": queryset.filter(pk__in=blocking_issues)
-            .annotate(
-                relation_type=Value("blocking", output_field=CharField())
-            )
-            .values(*fields),
-            "blocked_by": queryset.filter(pk__in=blocked_by_issues)
-            .annotate(
-                relation_type=Value("blocked_by", output_field=CharField())
-            )
-            .values(*fields),
-            "duplicate": queryset.filter(pk__in=duplicate_issues)
-            .annotate(
-                relation_type=Value(
-                    "duplicate",
-                    output_field=CharField(),
-                )
-            )
-            .values(*fields)
-            | queryset.filter(pk__in=duplicate_issues_related)
-            .annotate(
-                relation_type=Value(
-                    "duplicate",
-                    output_field=CharField(),
-                )
-            )
-            .values(*fields),
-            "relates_to": queryset.filter(pk__in=relates_to_issues)
-            .annotate(
-                relation_type=Value(
-                    "relates_to",
-                    output_field=CharField(),
-                )
-            )
-            .values(*fields)
-            | queryset.filter(pk__in=relates_to_issues_related)
-            .annotate(
-                relation_type=Value(
-                    "relates_to",
-                    output_field=CharField(),
-                )
-            )
-            .values(*fields),
+        relation_buckets = {
+            "blocking": blocking_issues,
+            "blocked_by": blocked_by_issues,
+            "duplicate": duplicate_ids,
+            "relates_to": relates_to_ids,
         }
 
+        # Fetch every related issue in one query and tag it in python for
+        # each bucket it belongs to
+        related_issues = {relation: [] for relation in relation_buckets}
+        for issue in queryset.filter(
+            pk__in=list(set().union(*relation_buckets.values()))
+        ):
+            for relation, issue_ids in relation_buckets.items():
+                if issue.id in issue_ids:
+                    related_issues[relation].append(
+                        related_issue_values(issue, relation)
+                    )
+
+        # Clients can opt in to one list per field instead of one dict per
+        # issue with ?columnar=true
+        columnar = request.GET.get("columnar", "false") == "true"
+        response_data = {}
+        for relation, rows in related_issues.items():
+            if columnar:
+                columns = list(zip(*rows)) or [()] * len(RELATED_ISSUE_FIELDS)
+                response_data[relation] = {
+                    field: list(column)
+                    for field, column in zip(RELATED_ISSUE_FIELDS, columns)
+                }
+            else:
+                response_data[relation] = [
+                    dict(zip(RELATED_ISSUE_FIELDS, row)) for row in rows
+                ]
+
         return Response(response_data, status=status.HTTP_200_OK)
 
     def create(self, request, slug, project_id, issue_id):
         relation_type = request.data.get("relation_type", None)
-        issues = request.data.get("issues", [])
-        project = Project.objects.get(pk=project_id)
+        # Drop repeated ids while keeping the request order
+        issues = list(dict.fromkeys(request.data.get("issues", [])))
+        workspace_id = Project.objects.values_list(
+            "workspace_id", flat=True
+        ).get(pk=project_id)
 
         issue_relation = IssueRelation.objects.bulk_create(
             [
@@ -234,19 +194,19 @@ class IssueRelationViewSet(BaseViewSet):
                         else relation_type
                     ),
                     project_id=project_id,
-                    workspace_id=project.workspace_id,
+                    workspace_id=workspace_id,
                     created_by=request.user,
                     updated_by=request.user,
                 )
                 for issue in issues
             ],
-            batch_size=10,
+            batch_size=500,
             ignore_conflicts=True,
         )
 
         issue_activity.delay(
             type="issue_relation.activity.created",
-            requested_data=json.dumps(request.data, cls=DjangoJSONEncoder),
+            requested_data=request.data,
             actor_id=str(request.user.id),
             issue_id=str(issue_id),
             project_id=str(project_id),
@@ -271,28 +231,33 @@ class IssueRelationViewSet(BaseViewSet):
         relation_type = request.data.get("relation_type", None)
         related_issue = request.data.get("related_issue", None)
 
+        lookup = {
+            "workspace__slug": slug,
+            "project_id": project_id,
+        }
         if relation_type == "blocking":
-            issue_relation = IssueRelation.objects.get(
-                workspace__slug=slug,
-                project_id=project_id,
-                issue_id=related_issue,
-                related_issue_id=issue_id,
-            )
+            lookup.update(issue_id=related_issue, related_issue_id=issue_id)
         else:
-            issue_relation = IssueRelation.objects.get(
-                workspace__slug=slug,
-                project_id=project_id,
-                issue_id=issue_id,
-                related_issue_id=related_issue,
-            )
+            lookup.update(issue_id=issue_id, related_issue_id=related_issue)
+        issue_relation = IssueRelation.objects.filter(**lookup)
+
+        # The relation's own columns are enough for the activity payload, so
+        # skip the serializer and its related issue lookup
         current_instance = json.dumps(
-            IssueRelationSerializer(issue_relation).data,
+            issue_relation.values(
+                "id",
+                "issue_id",
+                "related_issue_id",
+                "relation_type",
+                "project_id",
+                "workspace_id",
+            ).get(),
             cls=DjangoJSONEncoder,
         )
         issue_relation.delete(soft=False)
         issue_activity.delay(
             type="issue_relation.activity.deleted",
-            requested_data=json.dumps(request.data, cls=DjangoJSONEncoder),
+            requested_data=request.data,
             actor_id=str(request.user.id),
             issue_id=str(issue_id),
             project_id=str(project_id),
@@ -1628,6 +1628,11 @@ def issue_activity(
     inbox=None,
 ):
     try:
+        # Callers may hand over the parsed request data as is, encode it
+        # here instead of in the request cycle
+        if requested_data is not None and not isinstance(requested_data, str):
+            requested_data = json.dumps(requested_data, cls=DjangoJSONEncoder)
+
         issue_activities = []
 
         project = Project.objects.get(pk=project_id)
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-14 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0081_remove_globalview_created_by_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="issuerelation",
+            index=models.Index(
+                fields=["workspace", "issue", "relation_type"],
+                name="issue_rel_ws_issue_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="issuerelation",
+            index=models.Index(
+                fields=["workspace", "related_issue", "relation_type"],
+                name="issue_rel_ws_related_type_idx",
+            ),
+        ),
+    ]
@@ -302,6 +302,16 @@ class IssueRelation(ProjectBaseModel):
                 name="issue_relation_unique_issue_related_issue_when_deleted_at_null",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["workspace", "issue", "relation_type"],
+                name="issue_rel_ws_issue_type_idx",
+            ),
+            models.Index(
+                fields=["workspace", "related_issue", "relation_type"],
+                name="issue_rel_ws_related_type_idx",
+            ),
+        ]
         verbose_name = "Issue Relation"
         verbose_name_plural = "Issue Relations"
         db_table = "issue_relations"